@@ -7,7 +7,7 @@ Run locally:
   Open http://127.0.0.1:5000
 
 Deploy on Render:
-  - Web Service: Build Command -> pip install --upgrade pip && pip install --no-cache-dir -r requirements.txt
+  - Web Service: Build Command -> pip install --upgrade pip && pip install --no-cache-dir -r requirements.txt && flask --app app init-db
   - Start Command -> gunicorn app:app
   - Env Vars:
       DATABASE_URL = (Render Postgres Internal URL)
@@ -17,22 +17,30 @@ Security notes:
   - This is an MVP. Keep /download_receipt protected unless you want public links.
 """
 
+import csv
+import hashlib
 import os
+import re
 import sqlite3
+import threading
+import time
+import zlib
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Optional
 
+import click
 from flask import (
     Flask,
     g,
     redirect,
-    render_template_string,
     request,
     url_for,
     flash,
     session,
     Response,
+    stream_with_context,
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -43,6 +51,7 @@ psycopg_rows = None
 try:
     import psycopg2  # type: ignore
     import psycopg2.extras  # type: ignore
+    import psycopg2.pool  # type: ignore
 except Exception:
     psycopg2 = None
 
@@ -57,10 +66,16 @@ if psycopg2 is None:
 APP_TITLE = "Rent & Light Bill Manager"
 DB_PATH = Path("rent_manager.db")
 DATABASE_URL = os.getenv("DATABASE_URL")
+EXPORT_BATCH_SIZE = 1000
+PAGE_SIZE = 50
 
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "change-this-in-production")
 
+PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+# Checked against when the username is unknown so failed logins take the same time
+_DUMMY_HASH = generate_password_hash("dummy", method=PASSWORD_HASH_METHOD)
+
 
 # --------------------- Helpers: DB selection & wrappers ---------------------
 
@@ -75,37 +90,121 @@ class PGResult:
         return self.cur.fetchall()
     def fetchone(self):
         return self.cur.fetchone()
+    def fetchmany(self, size):
+        return self.cur.fetchmany(size)
+
+
+# A "?" placeholder that is not inside a single-quoted string literal
+_PH_RE = re.compile(r"\?(?=(?:[^']*'[^']*')*[^']*$)")
+
+
+@lru_cache(maxsize=512)
+def _to_pg(query: str) -> str:
+    return _PH_RE.sub("%s", query)  # sqlite-style -> postgres-style placeholders
 
 
 class PGConn:
-    def __init__(self, raw_conn, driver="psycopg2"):
+    def __init__(self, raw_conn, driver="psycopg2", pool=None):
         self._conn = raw_conn
         self._driver = driver
+        self._pool = pool
+        # One cursor per connection; each execute() replaces the previous result set
+        if driver == "psycopg2":
+            self._cur = raw_conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)  # type: ignore
+        else:
+            self._cur = raw_conn.cursor(row_factory=psycopg_rows.dict_row)  # type: ignore
+        self._stream_cur = None
 
     def execute(self, query: str, params: Iterable[Any] = ()):
-        q = query.replace("?", "%s")  # sqlite-style -> postgres-style placeholders
+        self._cur.execute(_to_pg(query), params)
+        return PGResult(self._cur)
+
+    def executemany(self, query: str, seq_of_params: Iterable[Iterable[Any]]):
+        # Same signature as sqlite3.Connection.executemany; batches rows into few round trips
+        if self._driver == "psycopg2":
+            psycopg2.extras.execute_batch(self._cur, _to_pg(query), seq_of_params)  # type: ignore
+        else:
+            self._cur.executemany(_to_pg(query), seq_of_params)
+        return PGResult(self._cur)
+
+    def execute_stream(self, query: str, params: Iterable[Any] = ()):
+        """
+        Run a read on a server-side (named) cursor that returns plain tuples, so
+        fetchmany() pulls rows from the server in batches instead of the whole
+        result set landing in memory at execute(). One stream per connection.
+        """
+        if self._stream_cur is not None:
+            self._stream_cur.close()
         if self._driver == "psycopg2":
-            cur = self._conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)  # type: ignore
+            self._stream_cur = self._conn.cursor(name="stream")
         else:
-            cur = self._conn.cursor(row_factory=psycopg_rows.dict_row)  # type: ignore
-        cur.execute(q, params)
-        return PGResult(cur)
+            self._stream_cur = self._conn.cursor(name="stream", row_factory=psycopg_rows.tuple_row)  # type: ignore
+        self._stream_cur.itersize = EXPORT_BATCH_SIZE
+        self._stream_cur.execute(_to_pg(query), params)
+        return PGResult(self._stream_cur)
 
     def commit(self):
         self._conn.commit()
 
     def close(self):
-        self._conn.close()
+        for cur in (self._cur, self._stream_cur):
+            try:
+                if cur is not None:
+                    cur.close()
+            except Exception:
+                pass
+        if self._pool is None:
+            self._conn.close()
+            return
+        # Pooled: end any open transaction and hand the connection back
+        try:
+            self._conn.rollback()
+        finally:
+            self._pool.putconn(self._conn)
+
+
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+
+
+def get_pg_pool():
+    """
+    Lazily create one psycopg2 pool per process (i.e. per gunicorn worker).
+    The pool hands out the most recently returned connection first (LIFO).
+    """
+    global _pg_pool
+    if _pg_pool is None:
+        with _pg_pool_lock:
+            if _pg_pool is None:
+                _pg_pool = psycopg2.pool.ThreadedConnectionPool(  # type: ignore
+                    int(os.getenv("PG_POOL_MIN", 1)),
+                    int(os.getenv("PG_POOL_MAX", 10)),
+                    DATABASE_URL,
+                    sslmode=os.getenv("PGSSLMODE", "require"),
+                )
+    return _pg_pool
+
+
+# Per-connection SQLite tuning; journal_mode=WAL is persistent, so it is set once per process
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA foreign_keys=ON",
+)
+_sqlite_wal_enabled = False
 
 
 def get_db():
+    global _sqlite_wal_enabled
     if "db" in g:
         return g.db
     if using_postgres():
         # Prefer psycopg2; fallback to psycopg v3
         if psycopg2 is not None:
-            conn = psycopg2.connect(DATABASE_URL, sslmode=os.getenv("PGSSLMODE", "require"))  # type: ignore
-            g.db = PGConn(conn, driver="psycopg2")
+            pool = get_pg_pool()
+            g.db = PGConn(pool.getconn(), driver="psycopg2", pool=pool)
             return g.db
         elif psycopg is not None:
             conn = psycopg.connect(DATABASE_URL, sslmode=os.getenv("PGSSLMODE", "require"))  # type: ignore
@@ -116,10 +215,39 @@ def get_db():
     # default sqlite
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    if not _sqlite_wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _sqlite_wal_enabled = True
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
     g.db = conn
     return g.db
 
 
+def begin_write(db):
+    """
+    Open the write transaction explicitly. On SQLite BEGIN IMMEDIATE takes the
+    write lock up front. psycopg connections are already inside a transaction but
+    take no lock here; callers that read-then-write lock their rows with FOR UPDATE.
+    """
+    if isinstance(db, sqlite3.Connection):
+        db.execute("BEGIN IMMEDIATE")
+
+
+def execute_tuples(db, query: str, params: Iterable[Any] = ()):
+    """
+    Run a read whose rows are only indexed by position and fetched in batches,
+    returning plain tuples instead of sqlite3.Row / dict rows on either backend.
+    SQLite cursors already step through rows lazily; on Postgres this uses a
+    server-side cursor.
+    """
+    if isinstance(db, sqlite3.Connection):
+        cur = db.cursor()
+        cur.row_factory = None
+        return cur.execute(query, params)
+    return db.execute_stream(query, params)
+
+
 @app.teardown_appcontext
 def close_db(exception=None):
     db = g.pop("db", None)
@@ -140,7 +268,7 @@ CREATE TABLE IF NOT EXISTS tenants (
     monthly_rent INTEGER NOT NULL,
     rate_per_unit REAL NOT NULL DEFAULT 8.0,
     last_reading INTEGER NOT NULL DEFAULT 0,
-    created_at TEXT NOT NULL
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS bills (
@@ -154,7 +282,7 @@ CREATE TABLE IF NOT EXISTS bills (
     light_bill REAL NOT NULL,
     total REAL NOT NULL,
     paid INTEGER NOT NULL DEFAULT 0,
-    created_at TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (tenant_id) REFERENCES tenants(id)
 );
 
@@ -162,8 +290,27 @@ CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT UNIQUE NOT NULL,
     password_hash TEXT NOT NULL,
-    created_at TEXT NOT NULL
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS receipts (
+    bill_id INTEGER PRIMARY KEY,
+    html TEXT NOT NULL,
+    FOREIGN KEY (bill_id) REFERENCES bills(id)
+);
+
+CREATE TABLE IF NOT EXISTS cache_version (
+    id INTEGER PRIMARY KEY CHECK (id=1),
+    version INTEGER NOT NULL
 );
+
+INSERT INTO cache_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_bills_year_month ON bills(year DESC, month DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_bills_paid ON bills(paid, year DESC, month DESC);
+
+CREATE INDEX IF NOT EXISTS idx_bills_tenant ON bills(tenant_id);
 """
 
 POSTGRES_SCHEMA = """
@@ -174,7 +321,7 @@ CREATE TABLE IF NOT EXISTS tenants (
     monthly_rent INTEGER NOT NULL,
     rate_per_unit REAL NOT NULL DEFAULT 8.0,
     last_reading INTEGER NOT NULL DEFAULT 0,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
 CREATE TABLE IF NOT EXISTS bills (
@@ -188,31 +335,94 @@ CREATE TABLE IF NOT EXISTS bills (
     light_bill REAL NOT NULL,
     total REAL NOT NULL,
     paid INTEGER NOT NULL DEFAULT 0,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
     username TEXT UNIQUE NOT NULL,
     password_hash TEXT NOT NULL,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS receipts (
+    bill_id INTEGER PRIMARY KEY REFERENCES bills(id),
+    html TEXT NOT NULL
 );
+
+CREATE TABLE IF NOT EXISTS cache_version (
+    id INTEGER PRIMARY KEY CHECK (id=1),
+    version INTEGER NOT NULL
+);
+
+INSERT INTO cache_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_bills_year_month ON bills(year DESC, month DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_bills_paid ON bills(year DESC, month DESC) WHERE paid=0;
+
+CREATE INDEX IF NOT EXISTS idx_bills_tenant ON bills(tenant_id);
+
+-- Tables created before created_at had a default: ALTER (and its ACCESS EXCLUSIVE
+-- lock) only runs for columns that still lack one, so it is a no-op once migrated
+DO $$
+DECLARE t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['tenants', 'bills', 'users'] LOOP
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema=current_schema() AND table_name=t
+              AND column_name='created_at' AND column_default IS NULL
+        ) THEN
+            EXECUTE format('ALTER TABLE %I ALTER COLUMN created_at SET DEFAULT NOW()', t);
+        END IF;
+    END LOOP;
+END $$;
 """
 
 
+def _sqlite_add_created_at_defaults(conn):
+    """
+    Rebuild tables created before created_at had a DEFAULT. SQLite cannot change
+    a column default in place, so use its create/copy/drop/rename recipe.
+    """
+    for table in ("tenants", "bills", "users"):
+        cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        if not any(c[1] == "created_at" and c[4] is None for c in cols):
+            continue
+        create = next(stmt for stmt in SQLITE_SCHEMA.split(";\n") if f"EXISTS {table} (" in stmt)
+        conn.execute(create.replace(f"CREATE TABLE IF NOT EXISTS {table} (", f"CREATE TABLE {table}_new ("))
+        names = ", ".join(c[1] for c in cols)
+        conn.execute(f"INSERT INTO {table}_new ({names}) SELECT {names} FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+_db_initialized = False
+# Key of the Postgres advisory lock taken around schema setup; any constant unique to this app
+PG_INIT_LOCK_ID = 0x72656E74
+
+
 def init_db():
     """
-    Create DB tables at import/startup without requiring a Flask app context.
+    Create DB tables without requiring a Flask app context (run on each process's
+    first request, or explicitly via `flask --app app init-db`). The whole schema
+    is sent in one round trip, then bills paid before receipts were stored get
+    their snapshot; repeated calls are no-ops. On Postgres an advisory lock held
+    for the transaction makes workers starting together run this one at a time.
     """
+    global _db_initialized
+    if _db_initialized:
+        return
     if using_postgres():
-        statements = [s.strip() for s in POSTGRES_SCHEMA.strip().split(";\n\n") if s.strip()]
         # Prefer psycopg2; fallback to psycopg v3
         if psycopg2 is not None:
             conn = psycopg2.connect(DATABASE_URL, sslmode=os.getenv("PGSSLMODE", "require"))  # type: ignore
             try:
                 cur = conn.cursor()
-                for stmt in statements:
-                    cur.execute(stmt)
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (PG_INIT_LOCK_ID,))
+                cur.execute(POSTGRES_SCHEMA)
+                backfill_receipt_snapshots(PGConn(conn, "psycopg2"))
                 conn.commit()
             finally:
                 try: conn.close()
@@ -221,8 +431,9 @@ def init_db():
             conn = psycopg.connect(DATABASE_URL, sslmode=os.getenv("PGSSLMODE", "require"))  # type: ignore
             try:
                 with conn.cursor() as cur:
-                    for stmt in statements:
-                        cur.execute(stmt)
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (PG_INIT_LOCK_ID,))
+                    cur.execute(POSTGRES_SCHEMA)
+                backfill_receipt_snapshots(PGConn(conn, "psycopg"))
                 conn.commit()
             finally:
                 try: conn.close()
@@ -231,11 +442,31 @@ def init_db():
             raise RuntimeError("No PostgreSQL driver available. Install 'psycopg2-binary' or 'psycopg'.")
     else:
         with sqlite3.connect(DB_PATH) as conn:
+            _sqlite_add_created_at_defaults(conn)
             conn.executescript(SQLITE_SCHEMA)
+            conn.row_factory = sqlite3.Row
+            backfill_receipt_snapshots(conn)
+    _db_initialized = True
+
 
+_db_init_lock = threading.Lock()
 
-# Initialize DB on startup
-init_db()
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create the database tables."""
+    init_db()
+    click.echo("Database initialized.")
+
+
+@app.before_request
+def ensure_db():
+    # Schema runs once per process (one round trip per worker); init_db is idempotent.
+    # /health stays independent of the database so a failing init doesn't fail it.
+    if _db_initialized or request.endpoint == "health":
+        return
+    with _db_init_lock:
+        init_db()
 
 
 # --------------------- Templates ---------------------
@@ -247,25 +478,7 @@ BASE_HTML = """
   <meta charset="utf-8">
   <meta name="viewport" content="width=device-width, initial-scale=1">
   <title>{{ title }}</title>
-  <style>
-    body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Arial; margin:0; background:#f7f7fb; color:#111}
-    header{background:#222; color:#fff; padding:16px 20px;}
-    header h1{margin:0; font-size:20px}
-    main{max-width:980px; margin:24px auto; background:#fff; padding:20px; border-radius:14px; box-shadow:0 4px 12px rgba(0,0,0,.06)}
-    .row{display:flex; gap:12px; flex-wrap:wrap}
-    .card{flex:1; min-width:220px; background:#fafafa; border:1px solid #eee; padding:14px; border-radius:12px}
-    table{width:100%; border-collapse:collapse; margin-top:10px}
-    th,td{padding:10px; border-bottom:1px solid #eee; text-align:left}
-    th{background:#fafafa}
-    a.button, button, input[type=submit]{background:#111; color:#fff; border:none; padding:10px 12px; border-radius:10px; text-decoration:none; cursor:pointer}
-    .ghost{background:#f0f0f5; color:#111}
-    .ok{color:#0a7d2a; font-weight:600}
-    .bad{color:#b30000; font-weight:600}
-    form .group{margin:10px 0}
-    input, select{padding:10px; border:1px solid #ddd; border-radius:10px; width:100%}
-    .toolbar{display:flex; gap:8px; flex-wrap:wrap}
-    .flash{background:#e7f7ed; color:#0a7d2a; padding:8px 12px; border-radius:8px; margin:8px 0}
-  </style>
+  <link rel="stylesheet" href="{{ url_for('static', filename='app.css', v=static_version) }}">
 </head>
 <body>
   <header style="display:flex; align-items:center; justify-content:space-between">
@@ -292,17 +505,51 @@ BASE_HTML = """
 """
 
 
+# Bumps the stylesheet URL whenever app.css changes, so it can be cached as immutable.
+# Hashed from the contents: the mtime changes on every checkout even when the file doesn't.
+STATIC_VERSION = hashlib.sha1((Path(app.static_folder) / "app.css").read_bytes()).hexdigest()[:12]
+
+
+@app.context_processor
+def inject_static_version():
+    return {"static_version": STATIC_VERSION}
+
+
+@app.after_request
+def cache_static(response):
+    # Only real files: a 404 for a missing asset must not be cached for a year
+    if request.path.startswith(app.static_url_path + "/") and response.status_code in (200, 304):
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+# Compiled templates keyed by name; Jinja parses each source only once per process
+_TEMPLATES: dict = {}
+
+
+def render_cached(name: str, source: str, **context) -> str:
+    tmpl = _TEMPLATES.get(name)
+    if tmpl is None:
+        tmpl = _TEMPLATES[name] = app.jinja_env.from_string(source)
+    # Same context injection as render_template_string (request, session, g, ...)
+    app.update_template_context(context)
+    return tmpl.render(context)
+
+
 # --------------------- Auth ---------------------
 
+_OPEN_ENDPOINTS = frozenset({"login", "auth_init", "static", "health"})
+_OPEN_PATHS = frozenset({"/login", "/auth/init", "/health"})
+
+
 @app.before_request
 def require_login():
-    open_endpoints = {"login", "auth_init", "static", "health"}
-    if request.endpoint in open_endpoints:
+    if request.endpoint in _OPEN_ENDPOINTS:
         return
     # To allow public receipts, uncomment the next 2 lines:
     # if request.endpoint == "download_receipt":
     #     return
-    if not session.get("user_id") and request.path not in ("/login", "/auth/init", "/health"):
+    if not session.get("user_id") and request.path not in _OPEN_PATHS:
         return redirect(url_for("login"))
 
 
@@ -319,13 +566,14 @@ def auth_init():
             flash("Username and password are required.")
         else:
             db.execute(
-                "INSERT INTO users (username, password_hash, created_at) VALUES (?,?,?)",
-                (username, generate_password_hash(password), datetime.now().isoformat()),
+                "INSERT INTO users (username, password_hash) VALUES (?,?)",
+                (username, generate_password_hash(password, method=PASSWORD_HASH_METHOD)),
             )
             db.commit()
             flash("Admin user created. Please login.")
             return redirect(url_for("login"))
-    body = render_template_string(
+    body = render_cached(
+        "auth_init",
         """
         <h2>Initialize Admin</h2>
         <p>No users found. Create the first admin account.</p>
@@ -336,7 +584,7 @@ def auth_init():
         </form>
         """
     )
-    return render_template_string(BASE_HTML, title="Init | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="Init | " + APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -345,15 +593,17 @@ def login():
     if request.method == "POST":
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
-        row = db.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
-        if row and check_password_hash(row["password_hash"], password):
+        row = db.execute("SELECT id, username, password_hash FROM users WHERE username=?", (username,)).fetchone()
+        ok = check_password_hash(row["password_hash"] if row else _DUMMY_HASH, password)
+        if row and ok:
             session["user_id"] = row["id"]
             session["username"] = row["username"]
             flash("Welcome back!")
             return redirect(url_for("dashboard"))
         else:
             flash("Invalid username or password.")
-    body = render_template_string(
+    body = render_cached(
+        "login",
         """
         <h2>Login</h2>
         <form method="post">
@@ -364,7 +614,7 @@ def login():
         <p style="margin-top:10px;color:#555">First time? Go to <a href="{{ url_for('auth_init') }}">Initialize Admin</a>.</p>
         """
     )
-    return render_template_string(BASE_HTML, title="Login | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="Login | " + APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 @app.route("/logout")
@@ -379,19 +629,48 @@ def health():
     return {"status": "ok", "app": APP_TITLE}
 
 
+# --------------------- Billing ---------------------
+
+def compute_bill(start_reading: int, end_reading: int, rate_per_unit: float, monthly_rent: float):
+    """Return (units, light_bill, total) for one meter reading."""
+    units = end_reading - start_reading
+    light_bill = round(units * rate_per_unit, 2)
+    return units, light_bill, monthly_rent + light_bill
+
+
+# One constant WHERE clause per month/year filter combination, keyed by (month given,
+# year given). Each query keeps a fixed SQL text per combination, and plain equality
+# lets SQLite seek idx_bills_year_month instead of scanning it.
+BILL_FILTERS = {
+    (False, False): "",
+    (False, True): "WHERE b.year=?",
+    (True, False): "WHERE b.month=?",
+    (True, True): "WHERE b.year=? AND b.month=?",
+}
+
+
+def bill_filter(m: Optional[int], y: Optional[int]):
+    """Return the WHERE clause and its parameters for an optional month/year filter."""
+    return BILL_FILTERS[(m is not None, y is not None)], tuple(v for v in (y, m) if v is not None)
+
+
 # --------------------- Core UI ---------------------
 
 @app.route("/")
 def dashboard():
     db = get_db()
-    tenants = db.execute("SELECT * FROM tenants ORDER BY id DESC").fetchall()
+    tenant_count = db.execute("SELECT COUNT(*) AS n FROM tenants").fetchone()["n"]
+    unpaid_count = db.execute("SELECT COUNT(*) AS n FROM bills WHERE paid=0").fetchone()["n"]
     unpaid = db.execute(
-        "SELECT b.*, t.name, t.room FROM bills b JOIN tenants t ON t.id=b.tenant_id WHERE paid=0 ORDER BY year DESC, month DESC"
+        "SELECT b.id, b.month, b.year, b.units, b.light_bill, b.total, b.paid, t.name, t.room "
+        "FROM bills b JOIN tenants t ON t.id=b.tenant_id WHERE b.paid=0 ORDER BY b.year DESC, b.month DESC LIMIT 100"
     ).fetchall()
-    this_month = datetime.now().month
-    this_year = datetime.now().year
+    now = datetime.now()
+    this_month = now.month
+    this_year = now.year
 
-    body = render_template_string(
+    body = render_cached(
+        "dashboard",
         """
         <div class="toolbar">
           <a class="button" href="{{ url_for('new_tenant') }}">➕ Add Tenant</a>
@@ -404,11 +683,11 @@ def dashboard():
         <div class="row" style="margin-top:12px">
           <div class="card">
             <div><strong>Total tenants</strong></div>
-            <div style="font-size:28px">{{ tenants|length }}</div>
+            <div style="font-size:28px">{{ tenant_count }}</div>
           </div>
           <div class="card">
             <div><strong>Unpaid bills</strong></div>
-            <div style="font-size:28px">{{ unpaid|length }}</div>
+            <div style="font-size:28px">{{ unpaid_count }}</div>
           </div>
           <div class="card">
             <div><strong>Current cycle</strong></div>
@@ -439,19 +718,23 @@ def dashboard():
           {% endfor %}
         </table>
         """,
-        tenants=tenants,
+        tenant_count=tenant_count,
+        unpaid_count=unpaid_count,
         unpaid=unpaid,
         this_month=this_month,
         this_year=this_year,
     )
-    return render_template_string(BASE_HTML, title=APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title=APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 @app.route("/tenants")
 def tenants_list():
     db = get_db()
-    tenants = db.execute("SELECT * FROM tenants ORDER BY name").fetchall()
-    body = render_template_string(
+    tenants = db.execute(
+        "SELECT id, name, room, monthly_rent, rate_per_unit, last_reading FROM tenants ORDER BY name"
+    ).fetchall()
+    body = render_cached(
+        "tenants_list",
         """
         <div class="toolbar">
           <a class="button" href="{{ url_for('new_tenant') }}">➕ Add Tenant</a>
@@ -470,7 +753,7 @@ def tenants_list():
         """,
         tenants=tenants,
     )
-    return render_template_string(BASE_HTML, title="Tenants | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="Tenants | " + APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 @app.route("/tenant/new", methods=["GET", "POST"])
@@ -486,13 +769,14 @@ def new_tenant():
         else:
             db = get_db()
             db.execute(
-                "INSERT INTO tenants (name, room, monthly_rent, rate_per_unit, last_reading, created_at) VALUES (?,?,?,?,?,?)",
-                (name, room, monthly_rent, rate_per_unit, last_reading, datetime.now().isoformat()),
+                "INSERT INTO tenants (name, room, monthly_rent, rate_per_unit, last_reading) VALUES (?,?,?,?,?)",
+                (name, room, monthly_rent, rate_per_unit, last_reading),
             )
             db.commit()
             flash("Tenant added.")
             return redirect(url_for("tenants_list"))
-    body = render_template_string(
+    body = render_cached(
+        "new_tenant",
         """
         <div class="toolbar">
           <a class="button ghost" href="{{ url_for('tenants_list') }}">← Back</a>
@@ -508,13 +792,15 @@ def new_tenant():
         </form>
         """
     )
-    return render_template_string(BASE_HTML, title="New Tenant | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="New Tenant | " + APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 @app.route("/tenant/<int:tenant_id>/edit", methods=["GET", "POST"])
 def edit_tenant(tenant_id):
     db = get_db()
-    tenant = db.execute("SELECT * FROM tenants WHERE id=?", (tenant_id,)).fetchone()
+    tenant = db.execute(
+        "SELECT id, name, room, monthly_rent, rate_per_unit, last_reading FROM tenants WHERE id=?", (tenant_id,)
+    ).fetchone()
     if not tenant:
         flash("Tenant not found")
         return redirect(url_for("tenants_list"))
@@ -528,10 +814,12 @@ def edit_tenant(tenant_id):
             "UPDATE tenants SET name=?, room=?, monthly_rent=?, rate_per_unit=?, last_reading=? WHERE id=?",
             (name, room, monthly_rent, rate_per_unit, last_reading, tenant_id),
         )
+        bump_bills_version(db)
         db.commit()
         flash("Tenant updated.")
         return redirect(url_for("tenants_list"))
-    body = render_template_string(
+    body = render_cached(
+        "edit_tenant",
         """
         <div class="toolbar">
           <a class="button ghost" href="{{ url_for('tenants_list') }}">← Back</a>
@@ -548,20 +836,28 @@ def edit_tenant(tenant_id):
         """,
         t=tenant,
     )
-    return render_template_string(BASE_HTML, title="Edit Tenant | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="Edit Tenant | " + APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 @app.route("/reading/new", methods=["GET", "POST"])
 def new_reading():
     db = get_db()
-    tenants = db.execute("SELECT * FROM tenants ORDER BY name").fetchall()
+    now = datetime.now()
+    tenants = db.execute("SELECT id, name, room, rate_per_unit, last_reading FROM tenants ORDER BY name").fetchall()
     if request.method == "POST":
         tenant_id = int(request.form.get("tenant_id"))
         end_reading = int(request.form.get("end_reading", 0) or 0)
-        month = int(request.form.get("month", datetime.now().month))
-        year = int(request.form.get("year", datetime.now().year))
-
-        tenant = db.execute("SELECT * FROM tenants WHERE id=?", (tenant_id,)).fetchone()
+        month = int(request.form.get("month", now.month))
+        year = int(request.form.get("year", now.year))
+
+        # Lock the tenant before reading last_reading: a concurrent reading for the same
+        # tenant waits for this commit and then starts from our end_reading
+        begin_write(db)
+        tenant = db.execute(
+            "SELECT monthly_rent, rate_per_unit, last_reading FROM tenants WHERE id=?"
+            + (" FOR UPDATE" if using_postgres() else ""),
+            (tenant_id,),
+        ).fetchone()
         if not tenant:
             flash("Tenant not found")
             return redirect(url_for("new_reading"))
@@ -569,24 +865,26 @@ def new_reading():
         if end_reading < start_reading:
             flash("End reading cannot be less than last reading.")
             return redirect(url_for("new_reading"))
-        units = end_reading - start_reading
-        light_bill = round(units * float(tenant["rate_per_unit"]), 2)
-        total = float(tenant["monthly_rent"]) + light_bill
+        units, light_bill, total = compute_bill(
+            start_reading, end_reading, float(tenant["rate_per_unit"]), float(tenant["monthly_rent"])
+        )
 
         db.execute(
-            "INSERT INTO bills (tenant_id, month, year, start_reading, end_reading, units, light_bill, total, paid, created_at) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            "INSERT INTO bills (tenant_id, month, year, start_reading, end_reading, units, light_bill, total, paid) VALUES (?,?,?,?,?,?,?,?,?)",
             (
                 tenant_id, month, year,
                 start_reading, end_reading, units,
-                light_bill, total, 0, datetime.now().isoformat(),
+                light_bill, total, 0,
             ),
         )
         db.execute("UPDATE tenants SET last_reading=? WHERE id=?", (end_reading, tenant_id))
+        bump_bills_version(db)
         db.commit()
         flash(f"Bill created: Units {units}, Light ₹{light_bill:.0f}, Total ₹{total:.0f}")
         return redirect(url_for("bills_list"))
 
-    body = render_template_string(
+    body = render_cached(
+        "new_reading",
         """
         <div class="toolbar">
           <a class="button ghost" href="{{ url_for('dashboard') }}">← Back</a>
@@ -616,31 +914,51 @@ def new_reading():
         </form>
         """,
         tenants=tenants,
-        now=datetime.now(),
+        now=now,
     )
-    return render_template_string(BASE_HTML, title="New Reading | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="New Reading | " + APP_TITLE, app_title=APP_TITLE, body=body)
+
+
+# Bumped inside every write transaction that changes what the bills list or a receipt
+# shows, so cached pages keyed on an older version are never served again. The counter
+# lives in the database, so every worker sees a write as soon as it is committed.
+def bump_bills_version(db):
+    db.execute("UPDATE cache_version SET version=version+1 WHERE id=1")
+
+
+def bills_version() -> int:
+    # Read once per request; every cached lookup in the request shares it
+    if "bills_version" not in g:
+        row = get_db().execute("SELECT version AS version FROM cache_version WHERE id=1").fetchone()
+        g.bills_version = row["version"] if row else 0
+    return g.bills_version
+
+
+@lru_cache(maxsize=64)
+def _bills_page(m, y, page, version):
+    # One extra row tells us whether there is a next page without a COUNT(*)
+    where, params = bill_filter(m, y)
+    rows = get_db().execute(
+        "SELECT b.id, b.month, b.year, b.start_reading, b.end_reading, b.units, b.light_bill, b.total, b.paid, t.name, t.room "
+        f"FROM bills b JOIN tenants t ON t.id=b.tenant_id {where} ORDER BY b.year DESC, b.month DESC, b.id DESC LIMIT ? OFFSET ?",
+        params + (PAGE_SIZE + 1, (page - 1) * PAGE_SIZE),
+    ).fetchall()
+    return [dict(r) for r in rows]
 
 
 @app.route("/bills")
 def bills_list():
-    db = get_db()
     month = request.args.get("month")
     year = request.args.get("year")
-    params = []
-    where = []
-    if month:
-        where.append("month=?")
-        params.append(int(month))
-    if year:
-        where.append("year=?")
-        params.append(int(year))
-    where_sql = (" WHERE " + " AND ".join(where)) if where else ""
-    bills = db.execute(
-        f"SELECT b.*, t.name, t.room FROM bills b JOIN tenants t ON t.id=b.tenant_id {where_sql} ORDER BY year DESC, month DESC, id DESC",
-        params,
-    ).fetchall()
-
-    body = render_template_string(
+    m = int(month) if month else None
+    y = int(year) if year else None
+    page = max(1, request.args.get("page", 1, type=int))
+    bills = _bills_page(m, y, page, bills_version())
+    has_next = len(bills) > PAGE_SIZE
+    bills = bills[:PAGE_SIZE]
+
+    body = render_cached(
+        "bills_list",
         """
         <div class="toolbar">
           <a class="button ghost" href="{{ url_for('dashboard') }}">🏠 Dashboard</a>
@@ -656,10 +974,11 @@ def bills_list():
         </form>
         <table>
           <tr>
-            <th>Tenant</th><th>Room</th><th>Month</th><th>Start</th><th>End</th><th>Units</th><th>Light Bill (₹)</th><th>Total (₹)</th><th>Status</th><th>Actions</th>
+            <th></th><th>Tenant</th><th>Room</th><th>Month</th><th>Start</th><th>End</th><th>Units</th><th>Light Bill (₹)</th><th>Total (₹)</th><th>Status</th><th>Actions</th>
           </tr>
           {% for b in bills %}
           <tr>
+            <td>{% if not b['paid'] %}<input type="checkbox" name="ids" value="{{ b['id'] }}" form="bulk-paid" style="width:auto">{% endif %}</td>
             <td>{{ b['name'] }}</td>
             <td>{{ b['room'] or '-' }}</td>
             <td>{{ '%02d/%d' % (b['month'], b['year']) }}</td>
@@ -680,10 +999,22 @@ def bills_list():
           </tr>
           {% endfor %}
         </table>
+        <form id="bulk-paid" method="post" action="{{ url_for('mark_paid_bulk') }}" style="margin-top:12px">
+          <input type="submit" value="Mark Selected Paid">
+        </form>
+        {% if page > 1 or has_next %}
+        <div class="toolbar" style="margin-top:12px">
+          {% if page > 1 %}<a class="button ghost" href="{{ url_for('bills_list', month=request.args.get('month'), year=request.args.get('year'), page=page-1) }}">← Prev</a>{% endif %}
+          <span style="padding:10px">Page {{ page }}</span>
+          {% if has_next %}<a class="button ghost" href="{{ url_for('bills_list', month=request.args.get('month'), year=request.args.get('year'), page=page+1) }}">Next →</a>{% endif %}
+        </div>
+        {% endif %}
         """,
         bills=bills,
+        page=page,
+        has_next=has_next,
     )
-    return render_template_string(BASE_HTML, title="Bills | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="Bills | " + APP_TITLE, app_title=APP_TITLE, body=body)
 
 
 # --------------------- Reports & Export ---------------------
@@ -694,34 +1025,42 @@ def reports():
     month = request.args.get("month")
     year = request.args.get("year")
 
-    filters, params = [], []
+    m = y = None
     scope_label = "All Time"
     if year and year.isdigit():
-        filters.append("year=?")
-        params.append(int(year))
+        y = int(year)
         scope_label = f"Year {year}"
     if month and month.isdigit():
-        filters.append("month=?")
-        params.append(int(month))
+        m = int(month)
         scope_label = f"{int(month):02d}/{year}" if year else f"Month {month}"
+    where, params = bill_filter(m, y)
 
-    where_sql = (" WHERE " + " AND ".join(filters)) if filters else ""
+    page = max(1, request.args.get("page", 1, type=int))
     rows = db.execute(
-        f"SELECT b.*, t.name, t.room FROM bills b JOIN tenants t ON t.id=b.tenant_id {where_sql} ORDER BY year DESC, month DESC, id DESC",
-        params,
+        "SELECT b.month, b.year, b.units, b.light_bill, b.total, b.paid, t.name, t.room "
+        f"FROM bills b JOIN tenants t ON t.id=b.tenant_id {where} ORDER BY b.year DESC, b.month DESC, b.id DESC LIMIT ? OFFSET ?",
+        params + (PAGE_SIZE + 1, (page - 1) * PAGE_SIZE),
     ).fetchall()
-
-    total_units = sum(r["units"] for r in rows) if rows else 0
-    total_light = sum(float(r["light_bill"]) for r in rows) if rows else 0.0
-    total_rent = 0.0
-    for r in rows:
-        rent_row = db.execute("SELECT monthly_rent FROM tenants WHERE id=?", (r["tenant_id"],)).fetchone()
-        total_rent += float(rent_row["monthly_rent"]) if rent_row else 0.0
-    grand_total = sum(float(r["total"]) for r in rows) if rows else 0.0
-    received = sum(float(r["total"]) for r in rows if r["paid"]) if rows else 0.0
+    has_next = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+
+    # Totals are computed by the database; the detail rows above are only for the table
+    agg = db.execute(
+        "SELECT COALESCE(SUM(b.units),0) AS units, COALESCE(SUM(b.light_bill),0) AS light, "
+        "COALESCE(SUM(t.monthly_rent),0) AS rent, COALESCE(SUM(b.total),0) AS grand, "
+        "COALESCE(SUM(CASE WHEN b.paid=1 THEN b.total ELSE 0 END),0) AS received "
+        f"FROM bills b JOIN tenants t ON t.id=b.tenant_id {where}",
+        params,
+    ).fetchone()
+    total_units = int(agg["units"])
+    total_light = float(agg["light"])
+    total_rent = float(agg["rent"])
+    grand_total = float(agg["grand"])
+    received = float(agg["received"])
     outstanding = grand_total - received
 
-    body = render_template_string(
+    body = render_cached(
+        "reports",
         """
         <div class="toolbar">
           <a class="button ghost" href="{{ url_for('dashboard') }}">🏠 Dashboard</a>
@@ -762,8 +1101,17 @@ def reports():
           </tr>
           {% endfor %}
         </table>
+        {% if page > 1 or has_next %}
+        <div class="toolbar" style="margin-top:12px">
+          {% if page > 1 %}<a class="button ghost" href="{{ url_for('reports', month=request.args.get('month'), year=request.args.get('year'), page=page-1) }}">← Prev</a>{% endif %}
+          <span style="padding:10px">Page {{ page }}</span>
+          {% if has_next %}<a class="button ghost" href="{{ url_for('reports', month=request.args.get('month'), year=request.args.get('year'), page=page+1) }}">Next →</a>{% endif %}
+        </div>
+        {% endif %}
         """,
         rows=rows,
+        page=page,
+        has_next=has_next,
         scope=scope_label,
         total_units=total_units,
         total_light=total_light,
@@ -772,7 +1120,37 @@ def reports():
         received=received,
         outstanding=outstanding,
     )
-    return render_template_string(BASE_HTML, title="Reports | " + APP_TITLE, app_title=APP_TITLE, body=body)
+    return render_cached("base", BASE_HTML, title="Reports | " + APP_TITLE, app_title=APP_TITLE, body=body)
+
+
+# Columns are in CSV order so each row can be written positionally; one statement per
+# BILL_FILTERS clause, keyed by that clause
+EXPORT_SQL = {
+    where: "SELECT b.id, t.name, t.room, b.month, b.year, b.start_reading, b.end_reading, b.units, b.light_bill, b.total, b.paid "
+    f"FROM bills b JOIN tenants t ON t.id=b.tenant_id {where} ORDER BY b.year DESC, b.month DESC, b.id DESC"
+    for where in BILL_FILTERS.values()
+}
+
+
+class _Echo:
+    """File-like object whose write() hands back the line csv.writer produced."""
+    def write(self, value):
+        return value
+
+
+def _gzip_stream(chunks):
+    """Compress a stream of text chunks into one gzip member as they are produced."""
+    z = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = z.compress(chunk.encode("utf-8"))
+            if data:
+                yield data
+        yield z.flush()
+    finally:
+        # Closing the inner generator on client disconnect releases its request
+        # context and, with it, the DB connection
+        chunks.close()
 
 
 @app.route("/reports/export")
@@ -781,87 +1159,142 @@ def export_csv():
     month = request.args.get("month")
     year = request.args.get("year")
 
-    filters = []
-    params = []
+    m = y = None
     fname = "reports_all_time.csv"
     if year and year.isdigit():
-        filters.append("year=?")
-        params.append(int(year))
+        y = int(year)
         fname = f"reports_{year}.csv"
     if month and month.isdigit():
-        filters.append("month=?")
-        params.append(int(month))
+        m = int(month)
         if year and year.isdigit():
             fname = f"reports_{int(month):02d}-{year}.csv"
         else:
             fname = f"reports_month_{month}.csv"
 
-    where_sql = (" WHERE " + " AND ".join(filters)) if filters else ""
+    where, params = bill_filter(m, y)
+    cur = execute_tuples(db, EXPORT_SQL[where], params)
+
+    def generate():
+        # Rows are fetched one batch at a time and each batch is sent as one chunk
+        writer = csv.writer(_Echo(), quoting=csv.QUOTE_MINIMAL, lineterminator="\r\n")
+        yield writer.writerow(["Bill ID", "Tenant", "Room", "Month", "Year", "Start", "End", "Units", "Light Bill (₹)", "Total (₹)", "Paid"])
+        while True:
+            batch = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if not batch:
+                break
+            yield "".join(
+                # Python's round() (half to even) matches the '%.0f' amounts shown in the UI
+                writer.writerow((*r[:8], int(round(r[8])), int(round(r[9])), "Yes" if r[10] else "No"))
+                for r in batch
+            )
+
+    body = stream_with_context(generate())
+    headers = {"Content-Disposition": f"attachment; filename={fname}", "Vary": "Accept-Encoding"}
+    if request.accept_encodings.quality("gzip") > 0:
+        body = _gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, mimetype="text/csv", headers=headers)
+
+
+# --------------------- Bill actions ---------------------
+
+# Loaded once at import; templates/receipt.html is not re-checked for changes per request
+RECEIPT_TMPL = app.jinja_env.get_template("receipt.html")
+RECEIPT_DATE_FORMAT = "%d-%m-%Y %H:%M"
+
+RECEIPT_SELECT = (
+    "SELECT b.id, b.month, b.year, b.start_reading, b.end_reading, b.units, b.light_bill, b.total, b.paid, "
+    "t.name, t.room, t.monthly_rent, t.rate_per_unit FROM bills b JOIN tenants t ON t.id=b.tenant_id"
+)
+# The first snapshot wins: a paid receipt stays as it was when the bill was paid
+RECEIPT_SNAPSHOT_INSERT = "INSERT INTO receipts (bill_id, html) VALUES (?,?) ON CONFLICT (bill_id) DO NOTHING"
+
+
+def render_receipt(b, now=None) -> str:
+    return RECEIPT_TMPL.render(b=b, now=now or time.strftime(RECEIPT_DATE_FORMAT), app_title=APP_TITLE)
+
+
+def save_receipt_snapshots(db, bill_ids):
+    """
+    Render receipts for freshly paid bills and store them in the receipts table,
+    inside the caller's transaction.
+    """
+    placeholders = ",".join("?" * len(bill_ids))
+    rows = db.execute(f"{RECEIPT_SELECT} WHERE b.id IN ({placeholders})", list(bill_ids)).fetchall()
+    db.executemany(RECEIPT_SNAPSHOT_INSERT, [(r["id"], render_receipt(r)) for r in rows])
+
+
+def backfill_receipt_snapshots(db):
+    """
+    Store snapshots for bills that were paid before the receipts table existed,
+    so viewing a receipt never has to write. Called from init_db.
+    """
     rows = db.execute(
-        f"SELECT b.id, t.name, t.room, b.month, b.year, b.start_reading, b.end_reading, b.units, b.light_bill, b.total, b.paid "
-        f"FROM bills b JOIN tenants t ON t.id=b.tenant_id {where_sql} ORDER BY year DESC, month DESC, b.id DESC",
-        params,
+        f"{RECEIPT_SELECT} WHERE b.paid=1 AND NOT EXISTS (SELECT 1 FROM receipts r WHERE r.bill_id=b.id)"
     ).fetchall()
+    if rows:
+        db.executemany(RECEIPT_SNAPSHOT_INSERT, [(r["id"], render_receipt(r)) for r in rows])
 
-    output_lines = [
-        ["Bill ID", "Tenant", "Room", "Month", "Year", "Start", "End", "Units", "Light Bill (₹)", "Total (₹)", "Paid"],
-    ]
-    for r in rows:
-        output_lines.append([
-            r["id"], r["name"], r["room"], r["month"], r["year"], r["start_reading"], r["end_reading"],
-            r["units"], int(round(float(r["light_bill"]))), int(round(float(r["total"]))),
-            "Yes" if r["paid"] else "No"
-        ])
 
-    csv_text = "\r\n".join(",".join(f"\"{str(x).replace('\"','\"\"')}\"" for x in row) for row in output_lines)
-    return Response(csv_text, mimetype="text/csv", headers={"Content-Disposition": f"attachment; filename={fname}"})
+@lru_cache(maxsize=512)
+def _receipt_row(bill_id, version):
+    row = get_db().execute(f"{RECEIPT_SELECT} WHERE b.id=?", (bill_id,)).fetchone()
+    return dict(row) if row else None
 
 
-# --------------------- Bill actions ---------------------
-
 @app.route("/bill/<int:bill_id>/paid", methods=["POST"])
 def mark_paid(bill_id):
     db = get_db()
     db.execute("UPDATE bills SET paid=1 WHERE id=?", (bill_id,))
+    save_receipt_snapshots(db, [bill_id])
+    bump_bills_version(db)
     db.commit()
     flash("Marked as paid.")
     return redirect(request.referrer or url_for("bills_list"))
 
 
+@app.route("/bills/mark_paid_bulk", methods=["POST"])
+def mark_paid_bulk():
+    ids = [int(i) for i in request.form.getlist("ids") if i.isdigit()]
+    if not ids:
+        flash("No bills selected.")
+        return redirect(request.referrer or url_for("bills_list"))
+    db = get_db()
+    # One transaction (and one commit) for the whole batch
+    begin_write(db)
+    db.executemany("UPDATE bills SET paid=1 WHERE id=?", [(i,) for i in ids])
+    save_receipt_snapshots(db, ids)
+    bump_bills_version(db)
+    db.commit()
+    flash(f"Marked {len(ids)} bill(s) as paid.")
+    return redirect(request.referrer or url_for("bills_list"))
+
+
 @app.route("/bill/<int:bill_id>/receipt")
 def download_receipt(bill_id):
     db = get_db()
-    b = db.execute(
-        "SELECT b.*, t.name, t.room, t.monthly_rent, t.rate_per_unit FROM bills b JOIN tenants t ON t.id=b.tenant_id WHERE b.id=?",
-        (bill_id,),
-    ).fetchone()
-    if not b:
-        flash("Bill not found")
-        return redirect(url_for("bills_list"))
-    html = render_template_string(
-        """
-        <div style="max-width:680px; margin:24px auto; font-family:Arial">
-          <h2>Rent & Electricity Receipt</h2>
-          <p>Date: {{ now }}</p>
-          <hr>
-          <p><strong>Tenant:</strong> {{ b['name'] }} &nbsp; <strong>Room:</strong> {{ b['room'] or '-' }}</p>
-          <p><strong>Month:</strong> {{ '%02d/%d' % (b['month'], b['year']) }}</p>
-          <table style="width:100%; border-collapse:collapse" border="1" cellpadding="8">
-            <tr><th align="left">Description</th><th align="right">Amount (₹)</th></tr>
-            <tr><td>Rent</td><td align="right">{{ '%.0f' % b['monthly_rent'] }}</td></tr>
-            <tr><td>Electricity ({{ b['units'] }} units @ ₹{{ '%.2f' % b['rate_per_unit'] }}/unit)</td><td align="right">{{ '%.0f' % b['light_bill'] }}</td></tr>
-            <tr><td><strong>Total</strong></td><td align="right"><strong>{{ '%.0f' % b['total'] }}</strong></td></tr>
-          </table>
-          <p>Meter: {{ b['start_reading'] }} → {{ b['end_reading'] }}</p>
-          <p>Status: {{ 'Paid' if b['paid'] else 'Unpaid' }}</p>
-          <p style="margin-top:24px">— Generated by {{ app_title }}</p>
-        </div>
-        """,
-        b=b,
-        now=datetime.now().strftime("%d-%m-%Y %H:%M"),
-        app_title=APP_TITLE,
-    )
-    return html
+    snap = db.execute("SELECT html FROM receipts WHERE bill_id=?", (bill_id,)).fetchone()
+    html = snap["html"] if snap else None
+    if html is None:
+        b = _receipt_row(bill_id, bills_version())
+        if not b:
+            flash("Bill not found")
+            return redirect(url_for("bills_list"))
+    # Snapshots are tagged by their HTML; live (unpaid) receipts by the row they render
+    # plus the date printed on them, which changes every minute
+    now = time.strftime(RECEIPT_DATE_FORMAT)
+    if html is not None:
+        etag = hashlib.sha1(html.encode()).hexdigest()
+    else:
+        etag = hashlib.sha1(repr((sorted(b.items()), now)).encode()).hexdigest()
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(html if html is not None else render_receipt(b, now))
+    resp.set_etag(etag)
+    # Receipts sit behind login: browser cache only, revalidated on each view
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
 
 
 if __name__ == "__main__":